@@ -6,16 +6,25 @@
 """World Radio Prefixes - RCLDX companion software"""
 
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from itertools import batched
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
 import argparse
 import csv
 import json
-import redis
+import pickle
+import sys
 from config import get_config
 
-__updated__ = "2025-12-09 02:31:17"
+# Optional C-implemented JSON codec; stdlib json is used if missing
+try:
+    import orjson  # type: ignore[import-not-found]
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+__updated__ = "2026-10-15 02:23:05"
 
 ###############################################################################
 #
@@ -24,11 +33,18 @@ __updated__ = "2025-12-09 02:31:17"
 ###############################################################################
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PrefixInfo:
-    """Information associated with a radio prefix."""
+    """
+    Information associated with a radio prefix.
 
-    prefix: str
+    Pickled (as plain field tuples) in prefix_map.pkl: bump
+    PREFIX_CACHE_VERSION if a field changes meaning.
+    """
+
+    # Primary prefix of the entity (CSV "Prefix" column). Likely prefixes
+    # share the PrefixInfo of their row, so this is not always the map key.
+    primary_prefix: str
     name: str
     dxcc: Optional[int]
     country_code: str
@@ -36,6 +52,12 @@ class PrefixInfo:
     cq_zones: Optional[str]
 
 
+# PrefixInfo field names, in order (tags the pickled prefix map cache)
+_PREFIX_INFO_FIELDS = tuple(f.name for f in fields(PrefixInfo))
+
+# A csv dialect name ("excel"), dialect class (csv.excel_tab) or instance
+_DialectLike = Union[str, csv.Dialect, Type[csv.Dialect]]
+
 HERE = Path(__file__).resolve().parent
 RESOURCES_DIR = HERE / "resources"
 CSV_PATH = RESOURCES_DIR / "prefixes.csv"
@@ -47,9 +69,29 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 # JSON will now be written here: src/prefixes/output/prefixes.json
 DEFAULT_JSON_PATH = OUTPUT_DIR / "prefixes.json"
 
+# Pickled prefix map, reused by get_prefix_map() while newer than the CSV
+PREFIX_CACHE_PATH = OUTPUT_DIR / "prefix_map.pkl"
+
+# Format of PREFIX_CACHE_PATH. Bump it whenever the pickled layout or the
+# meaning of a PrefixInfo field changes, so caches written by older code
+# are rebuilt from the CSV instead of being trusted.
+PREFIX_CACHE_VERSION = 1
+
+# Default number of commands sent per Redis pipeline round trip, used
+# unless REDIS_BATCH_SIZE in config/env is set to a positive integer
+REDIS_BATCH_SIZE = 500
+
+# Keys removed per UNLINK command by clean_redis_prefixes()
+REDIS_UNLINK_BATCH_SIZE = 500
+
+# COUNT hint for SCAN: keys examined by Redis per cursor round trip
+REDIS_SCAN_COUNT = 1000
+
 # Lazy globals so this module can be imported cheaply
 _PREFIX_MAP: Optional[Dict[str, PrefixInfo]] = None
 _MAX_PREFIX_LEN: int = 0
+_PREFIX_TRIE: Optional[dict] = None
+_REDIS_CLIENT = None
 
 # Load config ONCE – it already pulls from env + dotenv inside config.py
 CONFIG: dict = get_config() or {}
@@ -66,138 +108,296 @@ def _parse_int(value: str) -> Optional[int]:
     value = (value or "").strip()
     if not value:
         return None
+    # Fast path: plain DXCC codes like "281" need no float round trip
+    if value.isdecimal():
+        return int(value)
     try:
         return int(float(value))
     except ValueError:
         return None
 
 
-def _resolve_columns(fieldnames: List[str]) -> dict[str, Optional[str]]:
+def _resolve_columns(header: List[str]) -> Dict[str, Optional[int]]:
     """
-    Map logical column names to real CSV headers, handling BOM and case/spacing.
+    Map logical column names to CSV column indices, handling case/spacing.
 
     Returns a dict with keys:
         prefix, name, dxcc, country_code, continent, cq_zones, likely_prefixes
-    and values = header name in the CSV (or None if not found).
+    and values = index of that column in the header row (or None if not found).
     """
 
-    norm = {(name or "").lstrip("\ufeff").strip().lower().replace(" ", "_"): name for name in fieldnames}
+    norm = {(name or "").strip().lower().replace(" ", "_"): idx for idx, name in enumerate(header)}
 
-    def col(key: str, *alts: str) -> Optional[str]:
-        for k in (key, *alts):
-            n = k.lower().replace(" ", "_")
-            if n in norm:
-                return norm[n]
-        return None
+    # Headers are normalized above, so spaced spellings ("Short Name") are
+    # already covered; only genuinely different names need a fallback.
+    dxcc = norm.get("adif_dxcc_code")
+    if dxcc is None:
+        dxcc = norm.get("adif")
+
+    likely_prefixes = norm.get("likely_prefixes")
+    if likely_prefixes is None:
+        likely_prefixes = norm.get("prefixes")
 
     return {
-        "prefix": col("prefix"),
-        "name": col("short_name", "short name"),
-        "dxcc": col("adif_dxcc_code", "adif_dxcc code", "adif"),
-        "country_code": col("country_code", "country code"),
-        "continent": col("continent"),
-        "cq_zones": col("cq_zones", "cq zones"),
-        "likely_prefixes": col("likely_prefixes", "likely prefixes", "prefixes"),
+        "prefix": norm.get("prefix"),
+        "name": norm.get("short_name"),
+        "dxcc": dxcc,
+        "country_code": norm.get("country_code"),
+        "continent": norm.get("continent"),
+        "cq_zones": norm.get("cq_zones"),
+        "likely_prefixes": likely_prefixes,
+    }
+
+
+def _iter_prefix_rows(
+    csv_path: Path,
+    dialect: _DialectLike = "excel",
+) -> Iterator[Tuple[str, str, Optional[int], str, str, Optional[str], str]]:
+    """
+    Yield one cleaned tuple per CSV data row:
+        (prefix, name, dxcc, country_code, continent, cq_zones, likely_prefixes)
+
+    The file is streamed row by row, so memory use does not grow with the
+    size of the CSV. Problems with the file are reported and end the
+    iteration early.
+    """
+    if not csv_path.exists():
+        print(f"[ERROR] CSV file not found at {csv_path}")
+        return
+
+    # utf-8-sig drops a leading BOM (Excel exports start with one)
+    with csv_path.open(newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f, dialect=dialect)
+
+        header = next(reader, None)
+        if not header:
+            print("[ERROR] prefixes.csv has no header row")
+            return
+
+        cols = _resolve_columns(header)
+
+        if cols["prefix"] is None:
+            print("[ERROR] Could not find 'Prefix' column in CSV")
+            return
+
+        # Fetch all fields of a row with a single itemgetter call. Columns missing
+        # from the header read an extra blank cell past the last real one, and
+        # short rows are padded so every index is valid.
+        width = max(idx for idx in cols.values() if idx is not None) + 1
+        blank = width
+        if None in cols.values():
+            width += 1
+        keys = ("prefix", "name", "dxcc", "country_code", "continent", "cq_zones", "likely_prefixes")
+        row_fields = itemgetter(*(blank if cols[key] is None else cols[key] for key in keys))
+
+        for row in reader:
+            if len(row) < width:
+                row += [""] * (width - len(row))
+
+            prefix, name, dxcc, country_code, continent, cq_zones, likely = row_fields(row)
+
+            prefix = prefix.strip().upper()
+            if not prefix:
+                continue
+
+            yield (
+                prefix,
+                name.strip(),
+                _parse_int(dxcc),
+                # Low-cardinality fields: intern so rows share one str per value
+                sys.intern(country_code.strip().lower()),
+                sys.intern(continent.strip().upper()),
+                sys.intern(cq_zones.strip()) or None,
+                likely,
+            )
+
+
+def _expand_prefix_rows(
+    csv_path: Path,
+    dialect: _DialectLike,
+    make_value: Callable[[str, str, Optional[int], str, str, Optional[str]], Any],
+) -> Dict[str, Any]:
+    """
+    Build a prefix -> value mapping from the CSV. make_value is called once
+    per row with (prefix, name, dxcc, country_code, continent, cq_zones) and
+    its result is shared by the row's prefix and all of its likely prefixes.
+    """
+    prefix_map: Dict[str, Any] = {}
+
+    for base_prefix, name, dxcc, country_code, continent, cq_zones, likely in _iter_prefix_rows(csv_path, dialect):
+        value = make_value(base_prefix, name, dxcc, country_code, continent, cq_zones)
+
+        # 1) Main prefix
+        prefix_map[base_prefix] = value
+
+        # 2) Expand Likely Prefixes (upper-case the whole cell once, not per token)
+        if likely:
+            for pref in likely.upper().split(","):
+                pref = pref.strip()
+                if pref and pref != "???":
+                    prefix_map[pref] = value
+
+    return prefix_map
+
+
+def _payload_record(
+    primary_prefix: str,  # pylint: disable=unused-argument
+    name: str,
+    dxcc: Optional[int],
+    country_code: str,
+    continent: str,
+    cq_zones: Optional[str],
+) -> dict:
+    """Return the JSON/Redis record for one prefix (the prefix itself is the key)."""
+    return {
+        "name": name,
+        "dxcc": dxcc,
+        "country_code": country_code,
+        "continent": continent,
+        "cq_zones": cq_zones,
     }
 
 
 def load_prefix_table(
     csv_path: Optional[Path] = None,
+    dialect: _DialectLike = "excel",
 ) -> Dict[str, PrefixInfo]:
     """
     Load prefixes from the CSV file and return a mapping:
     prefix (e.g. "UA7") -> PrefixInfo.
 
     If csv_path is None, use the module-level CSV_PATH, which can be
-    monkeypatched in tests.
+    monkeypatched in tests. The bundled CSV is plain comma-separated
+    ("excel" dialect); pass another csv dialect for differently formatted
+    files.
     """
     if csv_path is None:
         csv_path = CSV_PATH
+    return _expand_prefix_rows(csv_path, dialect, PrefixInfo)
 
-    prefix_map: Dict[str, PrefixInfo] = {}
 
-    if not csv_path.exists():
-        print(f"[ERROR] CSV file not found at {csv_path}")
-        return prefix_map
+def load_prefix_table_dict(
+    csv_path: Optional[Path] = None,
+    dialect: _DialectLike = "excel",
+) -> Dict[str, dict]:
+    """
+    Like load_prefix_table(), but map each prefix straight to its plain
+    JSON/Redis record, skipping PrefixInfo when only serialization follows.
+    Prefixes from the same CSV row share one record dict.
+    """
+    if csv_path is None:
+        csv_path = CSV_PATH
+    return _expand_prefix_rows(csv_path, dialect, _payload_record)
 
-    with csv_path.open(newline="", encoding="utf-8") as f:
-        sample = f.read(4096)
-        f.seek(0)
-        try:
-            dialect = csv.Sniffer().sniff(sample)
-        except csv.Error:
-            dialect = csv.get_dialect("excel")
 
-        reader = csv.DictReader(f, dialect=dialect)
+def _is_up_to_date(source: Path, target: Path) -> bool:
+    """Return True if target exists and is not older than source."""
+    try:
+        return target.stat().st_mtime_ns >= source.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
 
-        if not reader.fieldnames:
-            print("[ERROR] prefixes.csv has no header row")
-            return {}
 
-        cols = _resolve_columns(reader.fieldnames)
+def build_prefix_trie(prefix_map: Dict[str, PrefixInfo]) -> dict:
+    """
+    Build a character trie from a prefix map.
 
-        prefix_col = cols["prefix"]
-        name_col = cols["name"]
-        dxcc_col = cols["dxcc"]
-        country_col = cols["country_code"]
-        continent_col = cols["continent"]
-        cq_col = cols["cq_zones"]
-        likely_col = cols["likely_prefixes"]
+    Each node is a dict mapping the next character to its child node; a node
+    that completes a prefix also stores its PrefixInfo under the None key.
+    """
+    trie: dict = {}
+    for prefix, info in prefix_map.items():
+        node = trie
+        for ch in prefix:
+            node = node.setdefault(ch, {})
+        node[None] = info
+    return trie
+
+
+def _load_pickle_cache(cache_path: Path, source: Path) -> Any:
+    """Return the object pickled at cache_path if it is newer than source, else None."""
+    if not _is_up_to_date(source, cache_path):
+        return None
+    try:
+        with cache_path.open("rb") as f:
+            return pickle.load(f)
+    except Exception as exc:  # noqa: BLE001
+        # Any failure to unpickle (truncated file, missing module, class
+        # changed since it was written, ...) is just a cache miss
+        print(f"[WARN] Ignoring unreadable cache at {cache_path}: {exc}")
+        return None
 
-        if prefix_col is None:
-            print("[ERROR] Could not find 'Prefix' column in CSV")
-            return {}
 
-        for row in reader:
-            base_prefix = (row.get(prefix_col) or "").strip().upper()
-            if not base_prefix:
-                continue
+def _save_pickle_cache(cache_path: Path, data: Any) -> None:
+    """Pickle data to cache_path; failing to write the cache is not fatal."""
+    try:
+        with cache_path.open("wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as exc:
+        print(f"[WARN] Could not write cache to {cache_path}: {exc}")
 
-            name = (row.get(name_col) or "").strip() if name_col else ""
-            dxcc = _parse_int(row.get(dxcc_col) or "") if dxcc_col else None
-            country_code = (row.get(country_col) or "").strip().lower() if country_col else ""
-            continent = (row.get(continent_col) or "").strip().upper() if continent_col else ""
-            cq_zones_raw = row.get(cq_col) if cq_col else None
-            cq_zones = str(cq_zones_raw).strip() if cq_zones_raw not in (None, "") else None
-
-            base_info = PrefixInfo(
-                prefix=base_prefix,
-                name=name,
-                dxcc=dxcc,
-                country_code=country_code,
-                continent=continent,
-                cq_zones=cq_zones,
-            )
 
-            # 1) Main prefix
-            prefix_map[base_prefix] = base_info
-
-            # 2) Expand Likely Prefixes
-            likely = row.get(likely_col) if likely_col else None
-            if isinstance(likely, str) and likely.strip():
-                for raw in likely.split(","):
-                    pref = raw.strip().upper()
-                    if not pref:
-                        continue
-                    if pref == "???":
-                        continue
-                    prefix_map[pref] = PrefixInfo(
-                        prefix=pref,
-                        name=name,
-                        dxcc=dxcc,
-                        country_code=country_code,
-                        continent=continent,
-                        cq_zones=cq_zones,
-                    )
+def _prefix_map_to_cache(prefix_map: Dict[str, PrefixInfo]) -> tuple:
+    """
+    Return prefix_map as (PREFIX_CACHE_VERSION, field names, {prefix: field
+    values}) for pickling. Only plain tuples are stored, never PrefixInfo
+    itself; prefixes sharing a PrefixInfo share one values tuple.
+    """
+    rows: Dict[int, tuple] = {}
+    data: Dict[str, tuple] = {}
+    for prefix, info in prefix_map.items():
+        values = rows.get(id(info))
+        if values is None:
+            values = rows[id(info)] = tuple(getattr(info, name) for name in _PREFIX_INFO_FIELDS)
+        data[prefix] = values
+    return (PREFIX_CACHE_VERSION, _PREFIX_INFO_FIELDS, data)
 
+
+def _prefix_map_from_cache(cached: Any) -> Optional[Dict[str, PrefixInfo]]:
+    """
+    Rebuild a prefix map from _prefix_map_to_cache() output, or return None
+    if cached was written in another format.
+    """
+    if not (
+        isinstance(cached, tuple)
+        and len(cached) == 3
+        and cached[0] == PREFIX_CACHE_VERSION
+        and cached[1] == _PREFIX_INFO_FIELDS
+        and isinstance(cached[2], dict)
+    ):
+        return None
+
+    infos: Dict[int, PrefixInfo] = {}
+    prefix_map: Dict[str, PrefixInfo] = {}
+    for prefix, values in cached[2].items():
+        info = infos.get(id(values))
+        if info is None:
+            info = infos[id(values)] = PrefixInfo(*values)
+        prefix_map[prefix] = info
     return prefix_map
 
 
+def _json_cache_path() -> Path:
+    """
+    Return the pickled copy of the default JSON export (prefixes.json ->
+    prefixes.pkl). Only DEFAULT_JSON_PATH gets one: pickles are never
+    written or loaded next to other JSON paths.
+    """
+    return DEFAULT_JSON_PATH.with_suffix(".pkl")
+
+
 def get_prefix_map() -> Dict[str, PrefixInfo]:
-    """Return the global prefix map, loading it from CSV on first use."""
+    """
+    Return the global prefix map, loading it on first use from the pickled
+    cache if it is up to date, or from CSV otherwise.
+    """
     global _PREFIX_MAP, _MAX_PREFIX_LEN
     if _PREFIX_MAP is None:
-        prefix_map = load_prefix_table()
+        prefix_map = _prefix_map_from_cache(_load_pickle_cache(PREFIX_CACHE_PATH, CSV_PATH))
+        if prefix_map is None:
+            prefix_map = load_prefix_table()
+            if prefix_map:
+                _save_pickle_cache(PREFIX_CACHE_PATH, _prefix_map_to_cache(prefix_map))
         _PREFIX_MAP = prefix_map
         _MAX_PREFIX_LEN = max((len(p) for p in prefix_map.keys()), default=0)
     return _PREFIX_MAP
@@ -209,42 +409,104 @@ def get_max_prefix_length() -> int:
     return _MAX_PREFIX_LEN
 
 
+def lookup_prefix(callsign: str) -> Optional[PrefixInfo]:
+    """
+    Return the PrefixInfo of the longest prefix matching the start of
+    callsign (e.g. "EA1ABC" -> EA1), or None if no prefix matches. The
+    result is shared by its whole CSV row, so its primary_prefix is the
+    entity's primary prefix (EA), not necessarily the one that matched.
+
+    Walks the prefix trie once instead of probing the map with every
+    slice of the callsign. The trie is built on the first lookup, so
+    callers that only export the map never pay for it.
+    """
+    global _PREFIX_TRIE
+    if _PREFIX_TRIE is None:
+        _PREFIX_TRIE = build_prefix_trie(get_prefix_map())
+    node: dict = _PREFIX_TRIE
+    match = None
+    for ch in callsign.strip().upper():
+        child: Optional[dict] = node.get(ch)
+        if child is None:
+            break
+        node = child
+        match = node.get(None, match)
+    return match
+
+
 def export_prefixes_json(
     json_path: Path = DEFAULT_JSON_PATH,
     prefix_map: Optional[Dict[str, PrefixInfo]] = None,
-) -> None:
+) -> Dict[str, dict]:
     """
     Export the prefix table to a JSON file suitable for
     in-memory loading or Redis insertion.
+
+    Returns the exported payload, so callers can reuse it without
+    reading the file back.
     """
     if prefix_map is None:
         prefix_map = get_prefix_map()
 
-    if not prefix_map:
-        print("[WARN] No prefixes loaded, JSON will be empty")
+    # Likely prefixes share their row's PrefixInfo, so build each record
+    # once per PrefixInfo and point every prefix of that row at it.
+    records: Dict[int, dict] = {}
+    payload: Dict[str, dict] = {}
+    for prefix, info in prefix_map.items():
+        record = records.get(id(info))
+        if record is None:
+            record = records[id(info)] = _payload_record(
+                info.primary_prefix, info.name, info.dxcc, info.country_code, info.continent, info.cq_zones
+            )
+        payload[prefix] = record
+
+    return write_prefixes_json(payload, json_path)
 
-    payload = {
-        prefix: {
-            "name": info.name,
-            "dxcc": info.dxcc,
-            "country_code": info.country_code,
-            "continent": info.continent,
-            "cq_zones": info.cq_zones,
-        }
-        for prefix, info in prefix_map.items()
-    }
 
-    json_path.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+def write_prefixes_json(payload: Dict[str, dict], json_path: Path = DEFAULT_JSON_PATH) -> Dict[str, dict]:
+    """
+    Write an already built prefix -> record payload to json_path (plus a
+    pickled copy when json_path is DEFAULT_JSON_PATH) and return it.
+    """
+    if not payload:
+        print("[WARN] No prefixes loaded, JSON will be empty")
+
+    # Compact UTF-8 output: the file is machine-read, and both encoders then
+    # produce the same bytes (orjson never escapes non-ASCII)
+    if orjson is not None:
+        json_path.write_bytes(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS))
+    else:
+        with json_path.open("w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
     print(f"[INFO] Exported {len(payload)} prefixes to {json_path}")
 
+    # Pickled copy for load_prefixes_json(); written after the JSON so it is
+    # never older than it
+    if json_path == DEFAULT_JSON_PATH:
+        _save_pickle_cache(_json_cache_path(), payload)
+    return payload
+
 
 def load_prefixes_json(json_path: Path = DEFAULT_JSON_PATH) -> Dict[str, dict]:
-    """Load the generated prefixes.json into a plain dict."""
-    if not json_path.exists():
+    """
+    Load the generated prefixes.json into a plain dict. For DEFAULT_JSON_PATH
+    the pickled copy written alongside it is preferred while up to date.
+    """
+    # A missing JSON also makes its pickle count as stale, so the pickle is
+    # never used without the JSON it was written from.
+    if json_path == DEFAULT_JSON_PATH:
+        cached = _load_pickle_cache(_json_cache_path(), json_path)
+        if isinstance(cached, dict):
+            return cached
+
+    try:
+        raw = json_path.read_bytes()
+    except FileNotFoundError:
         print(f"[ERROR] JSON file not found at {json_path}")
         return {}
+
     try:
-        data = json.loads(json_path.read_text(encoding="utf-8"))
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         if not isinstance(data, dict):
             print(f"[ERROR] JSON at {json_path} is not an object")
             return {}
@@ -266,8 +528,18 @@ def _get_redis_client():
     CONFIG comes from get_config() once, which already:
       - loads .env (via config.py)
       - reads environment variables
+
+    A successfully connected client is cached, so the connect + PING
+    handshake happens once per process (e.g. --clean redis --injectredis).
     """
-    if redis is None:
+    global _REDIS_CLIENT
+    if _REDIS_CLIENT is not None:
+        return _REDIS_CLIENT
+
+    # Imported here so CSV/JSON-only runs don't pay for loading redis-py
+    try:
+        import redis  # pylint: disable=import-outside-toplevel
+    except ImportError:
         print("[ERROR] redis library is not installed. Run: pip install redis")
         return None
 
@@ -308,11 +580,27 @@ def _get_redis_client():
         return None
 
     print(f"[INFO] Connected to Redis at {host}:{port}/{db}")
+    _REDIS_CLIENT = client
     return client
 
 
+def _dumps_compact(obj) -> bytes:
+    """Serialize obj as compact UTF-8 JSON bytes (same output with or without orjson)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _hset_mapping(info: dict) -> Dict[str, str]:
+    """Return info as an HSET mapping: None becomes "" and all values are strings."""
+    return {k: ("" if v is None else str(v)) for k, v in info.items()}
+
+
 def inject_prefixes_into_redis(prefixes: Dict[str, dict]) -> None:
-    """Insert all prefixes into Redis as hashes."""
+    """
+    Insert all prefixes into Redis as hashes, or as JSON string values
+    (one MSET per batch) when REDIS_PREFIX_FORMAT is "json".
+    """
     if not prefixes:
         print("[ERROR] No prefixes to inject into Redis")
         return
@@ -323,24 +611,44 @@ def inject_prefixes_into_redis(prefixes: Dict[str, dict]) -> None:
 
     print(f"[INFO] Injecting {len(prefixes)} prefixes into Redis")
 
-    pipe = client.pipeline(transaction=False)
+    as_json = str(CONFIG.get("REDIS_PREFIX_FORMAT") or "hash").lower() == "json"
+    batch_size = _parse_int(str(CONFIG.get("REDIS_BATCH_SIZE") or ""))
+    if batch_size is None or batch_size < 1:
+        batch_size = REDIS_BATCH_SIZE
+    encode = _dumps_compact if as_json else _hset_mapping
     count = 0
 
-    for prefix, info in prefixes.items():
-        key = f"rcldx:prefix:{prefix}"
-        # Convert None to "" and ensure all values are strings
-        mapping = {k: ("" if v is None else str(v)) for k, v in info.items()}
-        pipe.hset(key, mapping=mapping)
-        count += 1
-        if count % 1000 == 0:
+    # When the payload comes straight from export_prefixes_json, the likely
+    # prefixes of a CSV row share one record: encode each record only once.
+    encoded: Dict[int, Any] = {}
+
+    for batch in batched(prefixes.items(), batch_size):
+        values = {}
+        for prefix, info in batch:
+            value = encoded.get(id(info))
+            if value is None:
+                value = encoded[id(info)] = encode(info)
+            values[f"rcldx:prefix:{prefix}"] = value
+
+        if as_json:
+            client.mset(values)
+        else:
+            pipe = client.pipeline(transaction=False)
+            for key, mapping in values.items():
+                pipe.hset(key, mapping=mapping)
             pipe.execute()
+        count += len(batch)
 
-    pipe.execute()
     print(f"[INFO] Injected {count} prefix entries into Redis")
 
 
 def clean_local_files() -> None:
-    """Remove local generated files (currently prefixes.json)."""
+    """Remove local generated files (prefixes.json and its pickle caches)."""
+    for cache_path in (PREFIX_CACHE_PATH, _json_cache_path()):
+        if cache_path.exists():
+            cache_path.unlink()
+            print(f"[INFO] Removed local file {cache_path}")
+
     if DEFAULT_JSON_PATH.exists():
         DEFAULT_JSON_PATH.unlink()
         print(f"[INFO] Removed local file {DEFAULT_JSON_PATH}")
@@ -348,6 +656,15 @@ def clean_local_files() -> None:
         print(f"[INFO] No local prefixes.json found at {DEFAULT_JSON_PATH}; nothing to clean")
 
 
+def _scan_batches(client, pattern: str, count: int, batch_size: int) -> Iterator[Tuple[Any, ...]]:
+    """
+    Yield tuples of up to batch_size keys matching pattern. SCAN is issued
+    with a COUNT hint so each round trip examines count keys instead of the
+    server default of 10.
+    """
+    yield from batched(client.scan_iter(match=pattern, count=count), batch_size)
+
+
 def clean_redis_prefixes() -> None:
     """Remove Redis keys for RCLDX prefixes (rcldx:prefix:*)."""
     client = _get_redis_client()
@@ -357,12 +674,19 @@ def clean_redis_prefixes() -> None:
     pattern = "rcldx:prefix:*"
     print(f"[INFO] Searching for keys matching '{pattern}' in Redis")
 
-    keys = list(client.scan_iter(match=pattern))
-    if not keys:
+    # Unlink keys in bounded batches as SCAN yields them, so neither side
+    # ever holds the full key list. UNLINK frees the values in a background
+    # thread instead of blocking Redis.
+    found = 0
+    deleted = 0
+    for keys in _scan_batches(client, pattern, REDIS_SCAN_COUNT, REDIS_UNLINK_BATCH_SIZE):
+        found += len(keys)
+        deleted += client.unlink(*keys)
+
+    if not found:
         print(f"[INFO] No keys matching '{pattern}' found in Redis; nothing to clean")
         return
 
-    deleted = client.delete(*keys)
     print(f"[INFO] Deleted {deleted} Redis keys matching '{pattern}'")
 
 
@@ -373,11 +697,33 @@ def clean_redis_prefixes() -> None:
 ###############################################################################
 
 
+def _run_parsecsv(force: bool = False) -> Optional[Dict[str, dict]]:
+    """
+    Parse the CSV into prefixes.json unless the JSON is already up to date.
+    Returns the exported payload, or None if the export was skipped.
+    """
+    if not force and _is_up_to_date(CSV_PATH, DEFAULT_JSON_PATH):
+        print(f"[INFO] {DEFAULT_JSON_PATH} is up to date with {CSV_PATH}; skipping (use --force to rebuild)")
+        return None
+    print(f"[INFO] Parsing CSV from {CSV_PATH}")
+    return write_prefixes_json(load_prefix_table_dict(), DEFAULT_JSON_PATH)
+
+
+def _run_injectredis(payload: Optional[Dict[str, dict]] = None) -> None:
+    """Inject payload into Redis, loading prefixes.json if no payload is given."""
+    if payload is None:
+        print(f"[INFO] Loading prefixes from JSON at {DEFAULT_JSON_PATH}")
+        payload = load_prefixes_json(DEFAULT_JSON_PATH)
+    inject_prefixes_into_redis(payload)
+
+
 def main(argv: Optional[List[str]] = None) -> None:
     """
     CLI usage:
       - No arguments: print help
       - --parsecsv           : parse CSV and generate prefixes.json
+                               (skipped if prefixes.json is newer than the CSV)
+      - --force              : with --parsecsv, regenerate prefixes.json anyway
       - --injectredis        : load prefixes.json and inject into Redis
       - --clean {local,redis,all} : remove local JSON, Redis keys, or both
 
@@ -386,12 +732,26 @@ def main(argv: Optional[List[str]] = None) -> None:
         2) parsecsv
         3) injectredis
     """
+    # --clean targets and the functions they run. Built at call time so tests
+    # can monkeypatch the clean functions; tuple order fixes the
+    # local -> redis sequence. The keys double as the argparse choices.
+    clean_actions = {
+        "local": (clean_local_files,),
+        "redis": (clean_redis_prefixes,),
+        "all": (clean_local_files, clean_redis_prefixes),
+    }
+
     parser = argparse.ArgumentParser(description="World Radio Prefixes - CSV to JSON and Redis injector")
     parser.add_argument(
         "--parsecsv",
         action="store_true",
         help="Parse prefixes.csv from resources and generate prefixes.json in output/",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="With --parsecsv, regenerate prefixes.json even if it is up to date",
+    )
     parser.add_argument(
         "--injectredis",
         action="store_true",
@@ -399,7 +759,7 @@ def main(argv: Optional[List[str]] = None) -> None:
     )
     parser.add_argument(
         "--clean",
-        choices=["local", "redis", "all"],
+        choices=tuple(clean_actions),
         help="Clean generated prefixes.json, Redis prefixes, or both",
     )
 
@@ -410,23 +770,15 @@ def main(argv: Optional[List[str]] = None) -> None:
         return
 
     # 1) Cleaning step
-    if args.clean:
-        if args.clean in ("local", "all"):
-            clean_local_files()
-        if args.clean in ("redis", "all"):
-            clean_redis_prefixes()
+    for action in clean_actions.get(args.clean, ()):
+        action()
 
     # 2) Parse CSV → JSON
-    if args.parsecsv:
-        print(f"[INFO] Parsing CSV from {CSV_PATH}")
-        prefix_map = load_prefix_table()
-        export_prefixes_json(DEFAULT_JSON_PATH, prefix_map)
+    payload = _run_parsecsv(args.force) if args.parsecsv else None
 
-    # 3) JSON → Redis
+    # 3) JSON → Redis (reuse the payload just exported instead of re-reading it)
     if args.injectredis:
-        print(f"[INFO] Loading prefixes from JSON at {DEFAULT_JSON_PATH}")
-        prefixes = load_prefixes_json(DEFAULT_JSON_PATH)
-        inject_prefixes_into_redis(prefixes)
+        _run_injectredis(payload)
 
 
 ###############################################################################
@@ -436,6 +788,4 @@ def main(argv: Optional[List[str]] = None) -> None:
 ###############################################################################
 
 if __name__ == "__main__":
-    import sys
-
     main(sys.argv[1:])
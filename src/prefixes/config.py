@@ -5,21 +5,30 @@
 
 """World Radio Prefixes - RCLDX companion software"""
 
-__updated__ = "2025-12-09 01:42:57"
+__updated__ = "2026-10-15 02:16:44"
 
 import os
-from dotenv import load_dotenv, find_dotenv
+from functools import lru_cache
 
 
 # Load .env if present (ideal for local development).
 # In containers, if .env is missing, environment variables are used as-is.
-load_dotenv(find_dotenv())
+# Deployed environments (SERVICE_ENV other than local/dev) and RCLDX_NO_DOTENV
+# skip both the dotenv import and find_dotenv()'s walk up the directory tree.
+if not os.getenv("RCLDX_NO_DOTENV") and os.getenv("SERVICE_ENV", "local") in ("local", "dev"):
+    from dotenv import load_dotenv, find_dotenv
 
+    load_dotenv(find_dotenv())
 
+
+@lru_cache(maxsize=1)
 def get_config() -> dict:
     """
     Return the 12-factor configuration as a simple dict.
     Valid for both API and worker modes.
+
+    The environment is read once per process; call get_config.cache_clear()
+    to pick up later changes.
     """
 
     # --- Service environment ---
@@ -38,4 +47,9 @@ def get_config() -> dict:
         "REDIS_DB": os.getenv("REDIS_DB", "0"),
         "REDIS_PASSWORD": os.getenv("REDIS_PASSWORD", "none"),
         "REDIS_MAX_CONN": os.getenv("REDIS_MAX_CONN", "25"),
+        # Commands per pipeline round trip when injecting prefixes
+        # (empty: use app.REDIS_BATCH_SIZE)
+        "REDIS_BATCH_SIZE": os.getenv("REDIS_BATCH_SIZE", ""),
+        # "hash" (one HSET per prefix) or "json" (MSET of JSON strings)
+        "REDIS_PREFIX_FORMAT": os.getenv("REDIS_PREFIX_FORMAT", "hash"),
     }
@@ -3,11 +3,17 @@
 
 """World Radio Prefixes - RCLDX companion software"""
 
-__updated__ = "2025-12-09 02:24:33"
+__updated__ = "2026-10-15 02:24:11"
 
+import csv
 import json
+import os
+import pickle
+import sys
+import types
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import pytest
 
@@ -37,6 +43,8 @@ class FakeRedisClient:
         self._keys = set(keys or [])
         self.pipeline_obj = FakePipeline()
         self.deleted: List[str] = []
+        self.mset_calls: List[Dict[str, bytes]] = []
+        self.scan_count = None
         self.ping_called = False
 
     # Used by _get_redis_client() when not monkeypatched
@@ -47,8 +55,14 @@ class FakeRedisClient:
     def pipeline(self, transaction=False):
         return self.pipeline_obj
 
+    # Used by inject_prefixes_into_redis() with REDIS_PREFIX_FORMAT=json
+    def mset(self, mapping: Dict[str, bytes]):
+        self.mset_calls.append(mapping)
+        return True
+
     # Used by clean_redis_prefixes()
-    def scan_iter(self, match: str):
+    def scan_iter(self, match: str, count=None):
+        self.scan_count = count
         # Very simple "match rcldx:prefix:*"
         prefix = match.replace("*", "")
         for k in list(self._keys):
@@ -62,6 +76,9 @@ class FakeRedisClient:
                 self.deleted.append(k)
         return len(keys)
 
+    def unlink(self, *keys):
+        return self.delete(*keys)
+
 
 # ---------------------------------------------------------------------------
 # CSV → PrefixInfo map
@@ -95,10 +112,237 @@ def test_load_prefix_table_parses_prefix_and_likely_prefixes(tmp_path: Path):
     assert ea.cq_zones == "14"
 
     ea1 = prefix_map["EA1"]
+    assert ea1.primary_prefix == "EA"
+    assert not hasattr(ea1, "prefix")
     assert ea1.name == "Spain"
     assert ea1.dxcc == 281
 
 
+def test_load_prefix_table_dict_builds_shared_records(tmp_path: Path):
+    """load_prefix_table_dict should map prefixes to plain records shared within a row."""
+    csv_path = tmp_path / "prefixes.csv"
+    csv_path.write_text(
+        "Prefix,Short Name,ADIF DXCC Code,Country Code,Continent,CQ Zones,Likely Prefixes\n"
+        'EA,Spain,281,es,EU,14,"EA1, EA2"\n',
+        encoding="utf-8",
+    )
+
+    payload = app.load_prefix_table_dict(csv_path=csv_path)
+
+    assert payload["EA"] == {"name": "Spain", "dxcc": 281, "country_code": "es", "continent": "EU", "cq_zones": "14"}
+    assert payload["EA1"] is payload["EA"]
+    assert payload["EA2"] is payload["EA"]
+
+
+def test_load_prefix_table_missing_file(tmp_path: Path, capsys):
+    """A missing CSV should be reported and yield an empty map."""
+    prefix_map = app.load_prefix_table(csv_path=tmp_path / "missing.csv")
+    assert prefix_map == {}
+    assert "CSV file not found" in capsys.readouterr().out
+
+
+def test_load_prefix_table_custom_dialect(tmp_path: Path):
+    """A non-default csv dialect can be passed for differently formatted files."""
+    csv_path = tmp_path / "prefixes.csv"
+    csv_path.write_text("Prefix;Short Name;Likely Prefixes\nEA;Spain;EA1, EA2\n", encoding="utf-8")
+
+    class SemicolonDialect(csv.excel):
+        delimiter = ";"
+
+    prefix_map = app.load_prefix_table(csv_path=csv_path, dialect=SemicolonDialect)
+
+    assert prefix_map["EA2"].name == "Spain"
+
+
+def test_load_prefix_table_missing_optional_columns(tmp_path: Path):
+    """Columns absent from the header should load as empty values."""
+    csv_path = tmp_path / "prefixes.csv"
+    csv_path.write_text("Prefix,Short Name,Continent\nEA,Spain,EU\nF\n", encoding="utf-8")
+
+    prefix_map = app.load_prefix_table(csv_path=csv_path)
+
+    ea = prefix_map["EA"]
+    assert ea.name == "Spain"
+    assert ea.continent == "EU"
+    assert ea.dxcc is None
+    assert ea.country_code == ""
+    assert ea.cq_zones is None
+    assert prefix_map["F"].name == ""
+
+
+def test_get_prefix_map_uses_pickle_cache(tmp_path: Path, monkeypatch):
+    """get_prefix_map should write a pickle cache and reuse it while it is newer than the CSV."""
+    csv_path = tmp_path / "prefixes.csv"
+    csv_path.write_text(
+        "Prefix,Short Name,ADIF DXCC Code,Country Code,Continent,CQ Zones,Likely Prefixes\n"
+        "EA,Spain,281,es,EU,14,EA1\n",
+        encoding="utf-8",
+    )
+    cache_path = tmp_path / "prefix_map.pkl"
+
+    monkeypatch.setattr(app, "CSV_PATH", csv_path)
+    monkeypatch.setattr(app, "PREFIX_CACHE_PATH", cache_path)
+    monkeypatch.setattr(app, "_PREFIX_MAP", None)
+    monkeypatch.setattr(app, "_MAX_PREFIX_LEN", 0)
+    monkeypatch.setattr(app, "_PREFIX_TRIE", None)
+
+    prefix_map = app.get_prefix_map()
+    assert "EA1" in prefix_map
+    assert cache_path.exists()
+
+    def fail_load_prefix_table(csv_path=None):
+        raise AssertionError("CSV should not be parsed when the cache is fresh")
+
+    monkeypatch.setattr(app, "load_prefix_table", fail_load_prefix_table)
+    monkeypatch.setattr(app, "_PREFIX_MAP", None)
+
+    cached = app.get_prefix_map()
+    assert cached["EA1"].name == "Spain"
+    assert cached["EA1"] is cached["EA"]
+    assert app.get_max_prefix_length() == 3
+
+
+def test_get_prefix_map_ignores_cache_from_before_slots(tmp_path: Path, monkeypatch):
+    """
+    A fresh cache pickled from the old __dict__-based PrefixInfo must not be
+    loaded into the slots class (it would come back with every field set to
+    its own name).
+    """
+
+    @dataclass(frozen=True)
+    class LegacyPrefixInfo:
+        prefix: str
+        name: str
+        dxcc: Optional[int]
+        country_code: str
+        continent: str
+        cq_zones: Optional[str]
+
+    LegacyPrefixInfo.__module__ = app.PrefixInfo.__module__
+    LegacyPrefixInfo.__qualname__ = "PrefixInfo"
+    legacy = LegacyPrefixInfo(prefix="EA1", name="Spain", dxcc=281, country_code="es", continent="EU", cq_zones="14")
+    with monkeypatch.context() as m:
+        m.setattr(app, "PrefixInfo", LegacyPrefixInfo)
+        legacy_bytes = pickle.dumps({"EA1": legacy})
+
+    csv_path = tmp_path / "prefixes.csv"
+    csv_path.write_text(
+        "Prefix,Short Name,ADIF DXCC Code,Country Code,Continent,CQ Zones,Likely Prefixes\n"
+        "EA,Spain,281,es,EU,14,EA1\n",
+        encoding="utf-8",
+    )
+    cache_path = tmp_path / "prefix_map.pkl"
+    cache_path.write_bytes(legacy_bytes)
+    os.utime(csv_path, ns=(1_000_000_000, 1_000_000_000))
+
+    monkeypatch.setattr(app, "CSV_PATH", csv_path)
+    monkeypatch.setattr(app, "PREFIX_CACHE_PATH", cache_path)
+    monkeypatch.setattr(app, "_PREFIX_MAP", None)
+
+    ea1 = app.get_prefix_map()["EA1"]
+    assert isinstance(ea1, app.PrefixInfo)
+    assert (ea1.primary_prefix, ea1.name, ea1.dxcc) == ("EA", "Spain", 281)
+
+
+@pytest.mark.parametrize(
+    "cache_bytes",
+    [
+        # Unversioned dict of PrefixInfo, as written by older code
+        pickle.dumps(
+            {"EA": app.PrefixInfo(primary_prefix="XX", name="stale", dxcc=0, country_code="", continent="", cq_zones=None)}
+        ),
+        # Right layout, other cache version
+        pickle.dumps((app.PREFIX_CACHE_VERSION + 1, app._PREFIX_INFO_FIELDS, {"EA": ("XX", "stale", 0, "", "", None)})),
+        # References a module that cannot be imported
+        b"cnonexistent_prefixes_module\nPrefixInfo\n.",
+        # Truncated file
+        b"\x80",
+    ],
+    ids=["legacy", "version", "missing-module", "truncated"],
+)
+def test_get_prefix_map_rebuilds_unusable_cache(tmp_path: Path, monkeypatch, cache_bytes: bytes):
+    """A fresh cache in another format, or one that fails to unpickle, should fall back to the CSV."""
+    csv_path = tmp_path / "prefixes.csv"
+    csv_path.write_text(
+        "Prefix,Short Name,ADIF DXCC Code,Country Code,Continent,CQ Zones,Likely Prefixes\n"
+        "EA,Spain,281,es,EU,14,EA1\n",
+        encoding="utf-8",
+    )
+    cache_path = tmp_path / "prefix_map.pkl"
+    cache_path.write_bytes(cache_bytes)
+    os.utime(csv_path, ns=(1_000_000_000, 1_000_000_000))
+
+    monkeypatch.setattr(app, "CSV_PATH", csv_path)
+    monkeypatch.setattr(app, "PREFIX_CACHE_PATH", cache_path)
+    monkeypatch.setattr(app, "_PREFIX_MAP", None)
+
+    prefix_map = app.get_prefix_map()
+    assert prefix_map["EA"].name == "Spain"
+    assert prefix_map["EA"].primary_prefix == "EA"
+
+    # The rebuilt map replaced the unusable cache
+    rebuilt = app._prefix_map_from_cache(pickle.loads(cache_path.read_bytes()))
+    assert rebuilt is not None
+    assert rebuilt["EA1"].name == "Spain"
+
+
+def test_likely_prefixes_share_one_prefix_info(tmp_path: Path):
+    """Likely prefixes of a row should reference the row's PrefixInfo, not copies of it."""
+    csv_path = tmp_path / "prefixes.csv"
+    csv_path.write_text(
+        "Prefix,Short Name,ADIF DXCC Code,Country Code,Continent,CQ Zones,Likely Prefixes\n"
+        'EA,Spain,281,es,EU,14,"EA1, EA2"\n'
+        "EA8,Canary Is.,29,es,AF,33,EA8\n",
+        encoding="utf-8",
+    )
+
+    prefix_map = app.load_prefix_table(csv_path=csv_path)
+    trie = app.build_prefix_trie(prefix_map)
+
+    assert prefix_map["EA1"] is prefix_map["EA"]
+    assert prefix_map["EA2"] is prefix_map["EA"]
+    assert trie["E"]["A"]["8"][None] is prefix_map["EA8"]
+
+
+def test_lookup_prefix_longest_match(monkeypatch):
+    """lookup_prefix should return the longest prefix matching the callsign."""
+    ea = app.PrefixInfo(primary_prefix="EA", name="Spain", dxcc=281, country_code="es", continent="EU", cq_zones="14")
+    ea8 = app.PrefixInfo(primary_prefix="EA8", name="Canary Is.", dxcc=29, country_code="es", continent="AF", cq_zones="33")
+    prefix_map = {"EA": ea, "EA1": ea, "EA8": ea8}
+
+    monkeypatch.setattr(app, "_PREFIX_MAP", prefix_map)
+    monkeypatch.setattr(app, "_PREFIX_TRIE", None)
+
+    assert app.lookup_prefix("ea1abc") is ea
+    assert app.lookup_prefix("EA8XYZ") is ea8
+    assert app.lookup_prefix("EA") is ea
+    assert app.lookup_prefix("E") is None
+    assert app.lookup_prefix("K1ABC") is None
+    assert app._PREFIX_TRIE is not None  # built by the first lookup, then reused
+
+
+def test_get_prefix_map_does_not_build_trie(tmp_path: Path, monkeypatch):
+    """Loading the map alone (e.g. for an export) should not build the lookup trie."""
+    csv_path = tmp_path / "prefixes.csv"
+    csv_path.write_text(
+        "Prefix,Short Name,ADIF DXCC Code,Country Code,Continent,CQ Zones,Likely Prefixes\n"
+        "EA,Spain,281,es,EU,14,EA1\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(app, "CSV_PATH", csv_path)
+    monkeypatch.setattr(app, "PREFIX_CACHE_PATH", tmp_path / "prefix_map.pkl")
+    monkeypatch.setattr(app, "_PREFIX_MAP", None)
+    monkeypatch.setattr(app, "_PREFIX_TRIE", None)
+
+    app.get_prefix_map()
+    assert app._PREFIX_TRIE is None
+
+    info = app.lookup_prefix("EA1ABC")
+    assert info is not None
+    assert info.name == "Spain"
+    assert app._PREFIX_TRIE is not None
+
+
 # ---------------------------------------------------------------------------
 # JSON export / import
 # ---------------------------------------------------------------------------
@@ -110,7 +354,7 @@ def test_export_and_load_prefixes_json_roundtrip(tmp_path: Path):
 
     prefix_map = {
         "EA": app.PrefixInfo(
-            prefix="EA",
+            primary_prefix="EA",
             name="Spain",
             dxcc=281,
             country_code="es",
@@ -130,6 +374,59 @@ def test_export_and_load_prefixes_json_roundtrip(tmp_path: Path):
     assert data["EA"]["continent"] == "EU"
 
 
+def test_export_prefixes_json_writes_utf8_unescaped(tmp_path: Path):
+    """Non-ASCII names should be written as UTF-8 text, not \\uXXXX escapes."""
+    json_path = tmp_path / "prefixes.json"
+    prefix_map = {
+        "FO": app.PrefixInfo(
+            primary_prefix="FO", name="Clipperton Í.", dxcc=36, country_code="cp", continent="NA", cq_zones="7"
+        )
+    }
+
+    app.export_prefixes_json(json_path=json_path, prefix_map=prefix_map)
+
+    text = json_path.read_text(encoding="utf-8")
+    assert "Clipperton Í." in text
+    assert "\\u" not in text
+    assert json.loads(text)["FO"]["name"] == "Clipperton Í."
+
+
+def test_load_prefixes_json_prefers_fresh_pickle(tmp_path: Path, monkeypatch):
+    """load_prefixes_json should use the pickle written by export, and ignore it once stale."""
+    json_path = tmp_path / "prefixes.json"
+    monkeypatch.setattr(app, "DEFAULT_JSON_PATH", json_path)
+    prefix_map = {
+        "EA": app.PrefixInfo(primary_prefix="EA", name="Spain", dxcc=281, country_code="es", continent="EU", cq_zones="14")
+    }
+
+    app.export_prefixes_json(json_path=json_path, prefix_map=prefix_map)
+    cache_path = json_path.with_suffix(".pkl")
+    assert cache_path.exists()
+
+    # Tamper with the pickle: while it is fresh, it wins over the JSON
+    with cache_path.open("wb") as f:
+        pickle.dump({"EA": {"name": "cached"}}, f)
+    assert app.load_prefixes_json(json_path=json_path)["EA"]["name"] == "cached"
+
+    # Once the JSON is newer, the pickle is ignored
+    os.utime(cache_path, ns=(1_000_000_000, 1_000_000_000))
+    assert app.load_prefixes_json(json_path=json_path)["EA"]["name"] == "Spain"
+
+
+def test_json_pickle_only_for_default_path(tmp_path: Path, monkeypatch):
+    """Exports to, and loads from, other JSON paths should neither write nor trust a sibling pickle."""
+    monkeypatch.setattr(app, "DEFAULT_JSON_PATH", tmp_path / "default" / "prefixes.json")
+    json_path = tmp_path / "prefixes.json"
+    cache_path = tmp_path / "prefixes.pkl"
+
+    app.write_prefixes_json({"EA": {"name": "Spain"}}, json_path)
+    assert not cache_path.exists()
+
+    with cache_path.open("wb") as f:
+        pickle.dump({"EA": {"name": "planted"}}, f)
+    assert app.load_prefixes_json(json_path=json_path)["EA"]["name"] == "Spain"
+
+
 def test_load_prefixes_json_missing_file(tmp_path: Path):
     """Missing JSON should fail gracefully and return {}."""
     json_path = tmp_path / "does_not_exist.json"
@@ -137,6 +434,25 @@ def test_load_prefixes_json_missing_file(tmp_path: Path):
     assert data == {}
 
 
+def test_load_prefixes_json_ignores_orphaned_pickle(tmp_path: Path, monkeypatch):
+    """A leftover pickle must not be used once its JSON is gone."""
+    json_path = tmp_path / "prefixes.json"
+    monkeypatch.setattr(app, "DEFAULT_JSON_PATH", json_path)
+    with json_path.with_suffix(".pkl").open("wb") as f:
+        pickle.dump({"EA": {"name": "stale"}}, f)
+
+    data = app.load_prefixes_json(json_path=json_path)
+    assert data == {}
+
+
+def test_load_prefixes_json_invalid_file(tmp_path: Path):
+    """Malformed JSON should fail gracefully and return {}."""
+    json_path = tmp_path / "prefixes.json"
+    json_path.write_text("{not json", encoding="utf-8")
+    data = app.load_prefixes_json(json_path=json_path)
+    assert data == {}
+
+
 # ---------------------------------------------------------------------------
 # clean_local_files
 # ---------------------------------------------------------------------------
@@ -145,14 +461,21 @@ def test_load_prefixes_json_missing_file(tmp_path: Path):
 def test_clean_local_files_existing_and_missing(tmp_path: Path, monkeypatch):
     """clean_local_files should remove file if exists, and be graceful if not."""
 
-    # Point DEFAULT_JSON_PATH to our temp file
+    # Point DEFAULT_JSON_PATH and PREFIX_CACHE_PATH to our temp files
     fake_json = tmp_path / "prefixes.json"
     fake_json.write_text("{}", encoding="utf-8")
+    fake_cache = tmp_path / "prefix_map.pkl"
+    fake_cache.write_bytes(b"")
+    fake_json_cache = tmp_path / "prefixes.pkl"
+    fake_json_cache.write_bytes(b"")
     monkeypatch.setattr(app, "DEFAULT_JSON_PATH", fake_json)
+    monkeypatch.setattr(app, "PREFIX_CACHE_PATH", fake_cache)
 
-    # First call: file exists and should be deleted
+    # First call: files exist and should be deleted
     app.clean_local_files()
     assert not fake_json.exists()
+    assert not fake_cache.exists()
+    assert not fake_json_cache.exists()
 
     # Second call: no file, should not raise
     app.clean_local_files()
@@ -164,6 +487,26 @@ def test_clean_local_files_existing_and_missing(tmp_path: Path, monkeypatch):
 # ---------------------------------------------------------------------------
 
 
+def test_get_redis_client_connects_once(monkeypatch):
+    """_get_redis_client should ping once and then reuse the connected client."""
+    created: List[FakeRedisClient] = []
+
+    def fake_redis(**kwargs):
+        client = FakeRedisClient()
+        created.append(client)
+        return client
+
+    monkeypatch.setitem(sys.modules, "redis", types.SimpleNamespace(Redis=fake_redis))
+    monkeypatch.setattr(app, "_REDIS_CLIENT", None)
+
+    first = app._get_redis_client()
+    second = app._get_redis_client()
+
+    assert first is second
+    assert len(created) == 1
+    assert first.ping_called
+
+
 def test_inject_prefixes_into_redis_no_prefixes(capsys):
     """inject_prefixes_into_redis with {} should not crash."""
     app.inject_prefixes_into_redis({})
@@ -171,6 +514,17 @@ def test_inject_prefixes_into_redis_no_prefixes(capsys):
     assert "No prefixes to inject" in captured.out
 
 
+def test_inject_prefixes_into_redis_no_prefixes_skips_connect(monkeypatch):
+    """An empty payload should return before any Redis connection is attempted."""
+
+    def fail_get_client():
+        raise AssertionError("_get_redis_client should not be called for an empty payload")
+
+    monkeypatch.setattr(app, "_get_redis_client", fail_get_client)
+
+    app.inject_prefixes_into_redis({})
+
+
 def test_inject_prefixes_into_redis_uses_client(monkeypatch):
     """
     inject_prefixes_into_redis should:
@@ -210,6 +564,114 @@ def test_inject_prefixes_into_redis_uses_client(monkeypatch):
     assert mapping["continent"] == "EU"
 
 
+def test_inject_prefixes_into_redis_executes_per_batch(monkeypatch):
+    """inject_prefixes_into_redis should flush the pipeline once per REDIS_BATCH_SIZE prefixes."""
+    fake_client = FakeRedisClient()
+
+    def fake_get_client():
+        return fake_client
+
+    monkeypatch.setattr(app, "_get_redis_client", fake_get_client)
+    monkeypatch.setitem(app.CONFIG, "REDIS_BATCH_SIZE", "2")
+
+    info = {"name": "Spain", "dxcc": 281, "country_code": "es", "continent": "EU", "cq_zones": "14"}
+    prefixes = {f"EA{i}": info for i in range(5)}
+
+    app.inject_prefixes_into_redis(prefixes)
+
+    pipe = fake_client.pipeline_obj
+    assert len(pipe.hset_calls) == 5
+    assert pipe.executed == 3
+
+
+def test_inject_prefixes_into_redis_default_batch_size(monkeypatch):
+    """Without REDIS_BATCH_SIZE in config, the module-level REDIS_BATCH_SIZE applies."""
+    fake_client = FakeRedisClient()
+
+    def fake_get_client():
+        return fake_client
+
+    monkeypatch.setattr(app, "_get_redis_client", fake_get_client)
+    monkeypatch.setitem(app.CONFIG, "REDIS_BATCH_SIZE", "")
+    monkeypatch.setattr(app, "REDIS_BATCH_SIZE", 2)
+
+    info = {"name": "Spain", "dxcc": 281, "country_code": "es", "continent": "EU", "cq_zones": "14"}
+    app.inject_prefixes_into_redis({f"EA{i}": info for i in range(5)})
+
+    assert fake_client.pipeline_obj.executed == 3
+
+
+def test_inject_prefixes_into_redis_shared_records(monkeypatch):
+    """Prefixes sharing one record should all be stored, reusing one stringified mapping."""
+    fake_client = FakeRedisClient()
+
+    def fake_get_client():
+        return fake_client
+
+    monkeypatch.setattr(app, "_get_redis_client", fake_get_client)
+
+    info = {"name": "Spain", "dxcc": 281, "country_code": "es", "continent": "EU", "cq_zones": None}
+    app.inject_prefixes_into_redis({"EA": info, "EA1": info})
+
+    calls = fake_client.pipeline_obj.hset_calls
+    assert [c["key"] for c in calls] == ["rcldx:prefix:EA", "rcldx:prefix:EA1"]
+    assert calls[0]["mapping"] == {"name": "Spain", "dxcc": "281", "country_code": "es", "continent": "EU", "cq_zones": ""}
+    assert calls[1]["mapping"] is calls[0]["mapping"]
+
+
+def test_inject_prefixes_into_redis_json_format(monkeypatch):
+    """With REDIS_PREFIX_FORMAT=json, prefixes should be stored via MSET as JSON strings."""
+    fake_client = FakeRedisClient()
+
+    def fake_get_client():
+        return fake_client
+
+    monkeypatch.setattr(app, "_get_redis_client", fake_get_client)
+    monkeypatch.setitem(app.CONFIG, "REDIS_PREFIX_FORMAT", "json")
+
+    prefixes = {
+        "EA": {
+            "name": "Spain",
+            "dxcc": 281,
+            "country_code": "es",
+            "continent": "EU",
+            "cq_zones": None,
+        }
+    }
+
+    app.inject_prefixes_into_redis(prefixes)
+
+    assert fake_client.pipeline_obj.hset_calls == []
+    assert len(fake_client.mset_calls) == 1
+    value = fake_client.mset_calls[0]["rcldx:prefix:EA"]
+    assert json.loads(value) == prefixes["EA"]
+
+
+def test_dumps_compact_stdlib_matches_orjson(monkeypatch):
+    """The stdlib fallback should produce the same raw UTF-8 bytes orjson does."""
+    record = {"name": "Clipperton Í.", "dxcc": 36, "cq_zones": None}
+    expected = '{"name":"Clipperton Í.","dxcc":36,"cq_zones":null}'.encode("utf-8")
+
+    monkeypatch.setattr(app, "orjson", None)
+    assert app._dumps_compact(record) == expected
+
+
+def test_write_prefixes_json_stdlib_bytes(tmp_path: Path, monkeypatch):
+    """Without orjson, prefixes.json should be compact, key-sorted, unescaped UTF-8 (as orjson writes it)."""
+    json_path = tmp_path / "prefixes.json"
+    fo = app.PrefixInfo(primary_prefix="FO", name="Clipperton Í.", dxcc=36, country_code="cp", continent="NA", cq_zones="7")
+    ea = app.PrefixInfo(primary_prefix="EA", name="España", dxcc=281, country_code="es", continent="EU", cq_zones=None)
+
+    monkeypatch.setattr(app, "orjson", None)
+    app.export_prefixes_json(json_path=json_path, prefix_map={"FO": fo, "EA": ea})
+
+    expected = (
+        '{"EA":{"continent":"EU","country_code":"es","cq_zones":null,"dxcc":281,"name":"España"},'
+        '"FO":{"continent":"NA","country_code":"cp","cq_zones":"7","dxcc":36,"name":"Clipperton Í."}}'
+    ).encode("utf-8")
+    assert json_path.read_bytes() == expected
+
+
 # ---------------------------------------------------------------------------
 # clean_redis_prefixes
 # ---------------------------------------------------------------------------
@@ -246,6 +708,28 @@ def test_clean_redis_prefixes_deletes_keys(monkeypatch):
     assert "other:key" not in fake_client.deleted
 
 
+def test_clean_redis_prefixes_unlinks_in_batches(monkeypatch):
+    """clean_redis_prefixes should unlink matching keys in REDIS_UNLINK_BATCH_SIZE chunks."""
+    keys = [f"rcldx:prefix:EA{i}" for i in range(5)] + ["other:key"]
+    fake_client = FakeRedisClient(keys=keys)
+    unlink_sizes: List[int] = []
+    real_unlink = fake_client.unlink
+
+    def counting_unlink(*batch):
+        unlink_sizes.append(len(batch))
+        return real_unlink(*batch)
+
+    monkeypatch.setattr(fake_client, "unlink", counting_unlink)
+    monkeypatch.setattr(app, "_get_redis_client", lambda: fake_client)
+    monkeypatch.setattr(app, "REDIS_UNLINK_BATCH_SIZE", 2)
+
+    app.clean_redis_prefixes()
+
+    assert unlink_sizes == [2, 2, 1]
+    assert fake_client.scan_count == app.REDIS_SCAN_COUNT
+    assert sorted(fake_client.deleted) == sorted(keys[:5])
+
+
 # ---------------------------------------------------------------------------
 # CLI / main()
 # ---------------------------------------------------------------------------
@@ -283,6 +767,30 @@ def test_main_parsecsv_creates_json(tmp_path: Path, monkeypatch):
     assert "EA2" in data
 
 
+def test_main_parsecsv_skips_up_to_date_json(tmp_path: Path, monkeypatch):
+    """--parsecsv should not rebuild a JSON newer than the CSV unless --force is given."""
+    csv_content = (
+        "\ufeffPrefix,Short Name,ADIF DXCC Code,Country Code,Continent,CQ Zones,Likely Prefixes\n"
+        "EA,Spain,281,es,EU,14,EA\n"
+    )
+    csv_path = tmp_path / "prefixes.csv"
+    csv_path.write_text(csv_content, encoding="utf-8")
+
+    json_path = tmp_path / "prefixes.json"
+    json_path.write_text("{}", encoding="utf-8")
+    os.utime(csv_path, ns=(1_000_000_000, 1_000_000_000))
+    os.utime(json_path, ns=(2_000_000_000, 2_000_000_000))
+
+    monkeypatch.setattr(app, "CSV_PATH", csv_path)
+    monkeypatch.setattr(app, "DEFAULT_JSON_PATH", json_path)
+
+    app.main(["--parsecsv"])
+    assert json.loads(json_path.read_text(encoding="utf-8")) == {}
+
+    app.main(["--parsecsv", "--force"])
+    assert "EA" in json.loads(json_path.read_text(encoding="utf-8"))
+
+
 def test_main_injectredis_calls_inject(tmp_path: Path, monkeypatch):
     """--injectredis should load JSON and pass it to inject_prefixes_into_redis."""
     json_path = tmp_path / "prefixes.json"
@@ -311,6 +819,35 @@ def test_main_injectredis_calls_inject(tmp_path: Path, monkeypatch):
     assert received["EA"]["dxcc"] == 281
 
 
+def test_main_parsecsv_and_injectredis_reuses_payload(tmp_path: Path, monkeypatch):
+    """--parsecsv --injectredis should inject the freshly exported payload without re-reading JSON."""
+    csv_content = (
+        "\ufeffPrefix,Short Name,ADIF DXCC Code,Country Code,Continent,CQ Zones,Likely Prefixes\n"
+        'EA,Spain,281,es,EU,14,"EA1, EA2"\n'
+    )
+    csv_path = tmp_path / "prefixes.csv"
+    csv_path.write_text(csv_content, encoding="utf-8")
+
+    monkeypatch.setattr(app, "CSV_PATH", csv_path)
+    monkeypatch.setattr(app, "DEFAULT_JSON_PATH", tmp_path / "prefixes.json")
+
+    def fail_load_json(json_path=None):
+        raise AssertionError("prefixes.json should not be re-read")
+
+    received: Dict[str, Dict[str, Any]] = {}
+
+    def fake_inject(prefixes: Dict[str, Dict[str, Any]]):
+        received.update(prefixes)
+
+    monkeypatch.setattr(app, "load_prefixes_json", fail_load_json)
+    monkeypatch.setattr(app, "inject_prefixes_into_redis", fake_inject)
+
+    app.main(["--parsecsv", "--injectredis"])
+
+    assert set(received) == {"EA", "EA1", "EA2"}
+    assert received["EA2"]["dxcc"] == 281
+
+
 def test_main_clean_local_and_redis_order(monkeypatch):
     """
     --clean all should call clean_local_files() then clean_redis_prefixes().
@@ -363,3 +900,15 @@ def test_main_clean_redis_only(monkeypatch):
 
     app.main(["--clean", "redis"])
     assert calls == ["redis"]
+
+
+def test_main_clean_rejects_unknown_target(monkeypatch):
+    """--clean with a target outside the dispatch table should exit without cleaning."""
+    calls: List[str] = []
+
+    monkeypatch.setattr(app, "clean_local_files", lambda: calls.append("local"))
+    monkeypatch.setattr(app, "clean_redis_prefixes", lambda: calls.append("redis"))
+
+    with pytest.raises(SystemExit):
+        app.main(["--clean", "everything"])
+    assert calls == []
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""World Radio Prefixes - RCLDX companion software"""
+
+__updated__ = "2026-10-15 02:23:43"
+
+import importlib
+import sys
+import types
+from typing import List
+
+import pytest
+
+from prefixes import config
+
+
+# ---------------------------------------------------------------------------
+# Helpers / fixtures
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(autouse=True)
+def fresh_config():
+    """Start and end every test with an empty get_config() cache."""
+    config.get_config.cache_clear()
+    yield
+    config.get_config.cache_clear()
+
+
+def install_fake_dotenv(monkeypatch, calls: List[str], allowed: bool) -> None:
+    """
+    Replace the dotenv module with a stub that records its calls, or fails
+    the test on any call when allowed is False.
+    """
+    fake_dotenv = types.ModuleType("dotenv")
+
+    def record(name: str):
+        def fn(*args, **kwargs):
+            if not allowed:
+                raise AssertionError(f"dotenv.{name} should not be called")
+            calls.append(name)
+            return ""
+
+        return fn
+
+    fake_dotenv.find_dotenv = record("find_dotenv")  # type: ignore[attr-defined]
+    fake_dotenv.load_dotenv = record("load_dotenv")  # type: ignore[attr-defined]
+    monkeypatch.setitem(sys.modules, "dotenv", fake_dotenv)
+
+
+# ---------------------------------------------------------------------------
+# .env loading at import time
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("service_env", [None, "local", "dev"])
+def test_dotenv_loaded_for_local_and_dev(monkeypatch, service_env):
+    """Local/dev runs (the default) should load .env on import."""
+    if service_env is None:
+        monkeypatch.delenv("SERVICE_ENV", raising=False)
+    else:
+        monkeypatch.setenv("SERVICE_ENV", service_env)
+    monkeypatch.delenv("RCLDX_NO_DOTENV", raising=False)
+    calls: List[str] = []
+    install_fake_dotenv(monkeypatch, calls, allowed=True)
+
+    importlib.reload(config)
+
+    assert calls == ["find_dotenv", "load_dotenv"]
+
+
+@pytest.mark.parametrize("service_env", ["staging", "prod"])
+def test_dotenv_skipped_for_deployed_environments(monkeypatch, service_env):
+    """Deployed environments should not import dotenv or look for a .env."""
+    monkeypatch.setenv("SERVICE_ENV", service_env)
+    monkeypatch.delenv("RCLDX_NO_DOTENV", raising=False)
+    install_fake_dotenv(monkeypatch, [], allowed=False)
+
+    importlib.reload(config)
+
+
+def test_dotenv_skipped_with_rcldx_no_dotenv(monkeypatch):
+    """RCLDX_NO_DOTENV should skip .env loading even for local runs."""
+    monkeypatch.setenv("SERVICE_ENV", "local")
+    monkeypatch.setenv("RCLDX_NO_DOTENV", "1")
+    install_fake_dotenv(monkeypatch, [], allowed=False)
+
+    importlib.reload(config)
+
+
+# ---------------------------------------------------------------------------
+# get_config
+# ---------------------------------------------------------------------------
+
+
+def test_get_config_is_memoized(monkeypatch):
+    """get_config should read the environment once and return the same dict."""
+    monkeypatch.setenv("REDIS_HOST", "first.example")
+    first = config.get_config()
+
+    monkeypatch.setenv("REDIS_HOST", "second.example")
+    second = config.get_config()
+
+    assert second is first
+    assert second["REDIS_HOST"] == "first.example"
+
+
+def test_get_config_cache_clear_rereads_environment(monkeypatch):
+    """get_config.cache_clear() should make the next call pick up env changes."""
+    monkeypatch.setenv("REDIS_HOST", "first.example")
+    first = config.get_config()
+
+    monkeypatch.setenv("REDIS_HOST", "second.example")
+    config.get_config.cache_clear()
+    second = config.get_config()
+
+    assert second is not first
+    assert second["REDIS_HOST"] == "second.example"